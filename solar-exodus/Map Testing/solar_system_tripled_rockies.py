@@ -17,7 +17,17 @@ Outputs:
 """
 import numpy as np
 from PIL import Image
-import math, random
+import functools, hashlib, math, os
+
+try:  # optional: JIT-compiled texture sampling when numba is available
+    from numba import njit, prange
+except ImportError:
+    njit = prange = None
+
+try:  # optional: Poisson-disk belt candidates when scipy is available
+    from scipy.stats import qmc
+except ImportError:
+    qmc = None
 
 # ===================== PARAMETERS =====================
 WIDTH, HEIGHT = 16384, 8192
@@ -40,7 +50,7 @@ SHIFT_JUPITER = 1500  # px right
 BELT_LEFT_SHIFT  = 300   # px right
 BELT_RIGHT_SHIFT = 800   # px right
 
-random.seed(9090)  # keep belt randomness consistent baseline
+rng = np.random.default_rng(9090)  # keep belt randomness consistent baseline
 
 # ===================== PLANET DATA =====================
 PLANET_KM = {
@@ -102,32 +112,115 @@ ring_high_inner = {p: (ring_low_outer[p] + HIGH_GAP) if p != SATURN else None fo
 ring_high_outer = {p: (ring_high_inner[p] + HIGH_THICK) if p != SATURN else None for p in PLANET_KM}
 
 # ===================== CANVAS =====================
-canvas = np.zeros((HEIGHT, WIDTH), dtype=np.uint16)
+# Disk-backed rather than anonymous memory: the 256 MiB canvas pages in
+# lazily (fresh file, so zero-filled by the OS) and dirty regions can be
+# written back while PIL's encoder runs, halving peak RSS. The scratch
+# file is removed after the save.
+CANVAS_PATH = "/mnt/data/_canvas.u16"
+canvas = np.memmap(CANVAS_PATH, dtype=np.uint16, mode="w+", shape=(HEIGHT, WIDTH))
+
+# The squared-distance grid for a given radius is translation-invariant, so
+# the boolean masks are cached per radius and merely sliced for edge clipping
+# instead of being re-materialized on every call.
+@functools.lru_cache(maxsize=None)
+def _d2_template(r):
+    d = np.arange(-r, r + 1)
+    return (d * d)[None, :] + (d * d)[:, None]
+
+@functools.lru_cache(maxsize=None)
+def _disc_mask(r):
+    return _d2_template(r) <= r * r
+
+@functools.lru_cache(maxsize=None)
+def _inner_exclusion_mask(r_in):
+    # Pixels strictly inside a ring of inner radius r_in: d2 < r_in**2.
+    return _d2_template(r_in) < r_in * r_in
+
+@functools.lru_cache(maxsize=None)
+def _annulus_mask(r_out, r_in):
+    if 0 < r_out - r_in <= 16 and r_in > 0:
+        # Thin rings (every orbital/moon ring; only Saturn's band is wider)
+        # are built by punching the cached inner disc out of the cached
+        # outer one instead of comparing the full d2 grid twice.
+        m = _disc_mask(r_out).copy()
+        sl = slice(r_out - r_in, r_out + r_in + 1)
+        m[sl, sl] ^= _inner_exclusion_mask(r_in)
+        return m
+    d2 = _d2_template(r_out)
+    return (d2 <= r_out * r_out) & (d2 >= r_in * r_in)
+
+@functools.lru_cache(maxsize=None)
+def _disc_offsets(r):
+    dy, dx = np.nonzero(_disc_mask(r))
+    return (dy - r).astype(np.int32), (dx - r).astype(np.int32)
+
+# Small-asteroid radii are fixed, so their offset templates are built once at
+# startup and every asteroid paint is a pure indexed store; index clamping is
+# still needed because asteroid centres span the full canvas height.
+ASTEROID_R_MIN, ASTEROID_R_MAX = 8, 15
+for _r in range(ASTEROID_R_MIN, ASTEROID_R_MAX + 1):
+    _disc_offsets(_r)
+
+def draw_circles_batch(cxs, cys, r, val):
+    """Paint many discs of one radius with a single fancy-index assignment.
+
+    Centres must lie on the canvas; partially off-canvas discs are clipped
+    by clamping indices, which is equivalent to dropping them when the
+    centre itself is in bounds.
+    """
+    dy, dx = _disc_offsets(r)
+    ys = np.asarray(cys, dtype=np.int32)[:, None] + dy[None, :]
+    xs = np.asarray(cxs, dtype=np.int32)[:, None] + dx[None, :]
+    np.clip(ys, 0, HEIGHT - 1, out=ys)
+    np.clip(xs, 0, WIDTH - 1, out=xs)
+    canvas[ys.ravel(), xs.ravel()] = val
 
 def draw_circle(cx, cy, r, val):
     x0, x1 = max(0, cx - r), min(WIDTH - 1, cx + r)
     y0, y1 = max(0, cy - r), min(HEIGHT - 1, cy + r)
-    y = np.arange(y0, y1 + 1)[:, None]
-    x = np.arange(x0, x1 + 1)[None, :]
-    mask = (x - cx) ** 2 + (y - cy) ** 2 <= r ** 2
+    mask = _disc_mask(r)[y0 - (cy - r):y1 - (cy - r) + 1,
+                         x0 - (cx - r):x1 - (cx - r) + 1]
     canvas[y0:y1+1, x0:x1+1][mask] = val
 
 def draw_annulus(cx, cy, r_in, r_out, val):
     x0, x1 = max(0, cx - r_out), min(WIDTH - 1, cx + r_out)
     y0, y1 = max(0, cy - r_out), min(HEIGHT - 1, cy + r_out)
-    y = np.arange(y0, y1 + 1)[:, None]
-    x = np.arange(x0, x1 + 1)[None, :]
-    d2 = (x - cx)**2 + (y - cy)**2
-    mask = (d2 <= r_out**2) & (d2 >= r_in**2)
+    mask = _annulus_mask(r_out, r_in)[y0 - (cy - r_out):y1 - (cy - r_out) + 1,
+                                      x0 - (cx - r_out):x1 - (cx - r_out) + 1]
     canvas[y0:y1+1, x0:x1+1][mask] = val
 
+@functools.lru_cache(maxsize=None)
+def _annulus_offsets(r_out, r_in):
+    dy, dx = np.nonzero(_annulus_mask(r_out, r_in))
+    return (dy - r_out).astype(np.int32), (dx - r_out).astype(np.int32)
+
+def draw_annuli_batch(specs, val):
+    """Paint many (cx, cy, r_in, r_out) annuli, one fancy-index assignment
+    per distinct ring shape.
+
+    Annuli are not convex, so off-canvas pixels are dropped rather than
+    index-clamped (Pluto's rings run past the right edge).
+    """
+    by_shape = {}
+    for cx, cy, r_in, r_out in specs:
+        xs, ys = by_shape.setdefault((r_in, r_out), ([], []))
+        xs.append(cx); ys.append(cy)
+    for (r_in, r_out), (cxs, cys) in by_shape.items():
+        dy, dx = _annulus_offsets(r_out, r_in)
+        ys = np.asarray(cys, dtype=np.int32)[:, None] + dy[None, :]
+        xs = np.asarray(cxs, dtype=np.int32)[:, None] + dx[None, :]
+        valid = (ys >= 0) & (ys < HEIGHT) & (xs >= 0) & (xs < WIDTH)
+        canvas[ys[valid], xs[valid]] = val
+
 # ===================== Draw planetary rings & bodies =====================
+orbit_ring_specs = []
 for p in PLANET_KM:
     if p != SATURN:
         low_in = radius_px[p] + LOW_OFF
-        draw_annulus(centre_x[p], centre_y[p], low_in, low_in + LOW_THICK, GRAY_ORBIT_RING)
+        orbit_ring_specs.append((centre_x[p], centre_y[p], low_in, low_in + LOW_THICK))
         hi_in  = ring_high_inner[p]
-        draw_annulus(centre_x[p], centre_y[p], hi_in, hi_in + HIGH_THICK, GRAY_ORBIT_RING)
+        orbit_ring_specs.append((centre_x[p], centre_y[p], hi_in, hi_in + HIGH_THICK))
+draw_annuli_batch(orbit_ring_specs, GRAY_ORBIT_RING)
 sat_in  = radius_px["Saturn"] + 10
 sat_out = int(round(radius_px["Saturn"] * 1.5))
 draw_annulus(centre_x["Saturn"], centre_y["Saturn"], sat_in, sat_out, GRAY_SAT_RING)
@@ -136,26 +229,146 @@ for p in PLANET_KM:
     draw_circle(centre_x[p], centre_y[p], radius_px[p], GRAY_PLANET)
 
 # ===================== Texture mapping helpers =====================
+# The disc samplers read from a 6-face cubemap instead of the equirect
+# texture: the per-pixel asin/atan2 of the equirect projection reduce to a
+# major-axis pick plus one division. Faces share edge texel directions
+# (s,t = +-1 lie exactly on the cube edge), so bilinear lookups stay
+# continuous across face seams. Face layout: index 2*axis + (0 if positive
+# else 1) for axis order x,y,z; faces[f] is indexed [t, s] with the two
+# non-major axes (in x<y<z order) mapped to (s, t).
+def _equirect_to_cubemap(tex, face_size):
+    th, tw = tex.shape
+    F = face_size
+    g = np.linspace(-1.0, 1.0, F, dtype=np.float32)
+    s = np.broadcast_to(g[None, :], (F, F))
+    t = np.broadcast_to(g[:, None], (F, F))
+    one = np.ones((F, F), dtype=np.float32)
+    faces = np.empty((6, F, F), dtype=np.float32)
+    for f in range(6):
+        sign = 1.0 if f % 2 == 0 else -1.0
+        if f < 2:
+            x, y, z = sign * one, s, t
+        elif f < 4:
+            x, y, z = s, sign * one, t
+        else:
+            x, y, z = s, t, sign * one
+        lat = np.arcsin(y / np.sqrt(x*x + y*y + z*z))
+        lon = np.arctan2(x, z)
+        # float32 constants keep every intermediate at half the bandwidth of
+        # the default float64 promotion; the output is quantized to uint16
+        # anyway.
+        u = (lon + np.float32(np.pi)) * np.float32((tw - 1) / (2 * np.pi))
+        v = (np.float32(np.pi / 2) - lat) * np.float32((th - 1) / np.pi)
+        ui = np.floor(u).astype(np.int32)
+        vi = np.floor(v).astype(np.int32)
+        fu = u - ui
+        fv = v - vi
+        ui1 = (ui + 1) % tw               # wrap across the longitude seam
+        vi1 = np.minimum(vi + 1, th - 1)  # clamp at the poles
+        faces[f] = ((1 - fu) * (1 - fv) * tex[vi, ui] +
+                    fu * (1 - fv) * tex[vi, ui1] +
+                    (1 - fu) * fv * tex[vi1, ui] +
+                    fu * fv * tex[vi1, ui1])
+    return faces
+
+def _sample_disc_numpy(faces, r):
+    F = faces.shape[1]
+    yy = (np.arange(-r, r + 1, dtype=np.float32) / np.float32(r))[:, None]
+    xx = (np.arange(-r, r + 1, dtype=np.float32) / np.float32(r))[None, :]
+    r2 = xx * xx + yy * yy
+    mask = r2 <= np.float32(1.0)
+    z = np.sqrt(np.clip(np.float32(1.0) - r2, np.float32(0.0), None))
+    x = np.broadcast_to(xx, r2.shape)
+    y = np.broadcast_to(yy, r2.shape)
+    ax, ay = np.abs(x), np.abs(y)  # z >= 0 on the visible hemisphere
+    x_major = (ax >= ay) & (ax >= z)
+    y_major = ~x_major & (ay >= z)
+    fidx = np.where(x_major, np.where(x >= 0, 0, 1),
+                    np.where(y_major, np.where(y >= 0, 2, 3), 4))
+    m = np.maximum(np.maximum(ax, ay), z)
+    m[~mask] = np.float32(1.0)  # keep the dead corners away from 0/0
+    s = np.where(x_major, y, x) / m
+    t = np.where(fidx >= 4, y, z) / m
+    fs = (s + np.float32(1.0)) * np.float32(0.5 * (F - 1))
+    ft = (t + np.float32(1.0)) * np.float32(0.5 * (F - 1))
+    # Bilinear reconstruction from the 2x2 texel footprint; nearest-neighbour
+    # sampling visibly facets at the tripled radii.
+    si = np.floor(fs).astype(np.int32)
+    ti = np.floor(ft).astype(np.int32)
+    fu = fs - si
+    fv = ft - ti
+    si1 = np.minimum(si + 1, F - 1)
+    ti1 = np.minimum(ti + 1, F - 1)
+    tt = ((1 - fu) * (1 - fv) * faces[fidx, ti, si] +
+          fu * (1 - fv) * faces[fidx, ti, si1] +
+          (1 - fu) * fv * faces[fidx, ti1, si] +
+          fu * fv * faces[fidx, ti1, si1])
+    disc = (tt * 65535).astype(np.uint16)
+    disc[~mask] = 0
+    return disc
+
+if njit is not None:
+    # Same cubemap lookup and bilinear blend as _sample_disc_numpy, but as a
+    # plain per-pixel loop that numba compiles and splits across cores with
+    # prange.
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _sample_disc_jit(faces, r):
+        F = faces.shape[1]
+        diam = 2 * r + 1
+        disc = np.zeros((diam, diam), dtype=np.uint16)
+        for row in prange(diam):
+            dy = row - r
+            yy = dy / r
+            for col in range(diam):
+                dx = col - r
+                if dx*dx + dy*dy > r*r:
+                    continue
+                xx = dx / r
+                z = math.sqrt(max(0.0, 1.0 - xx*xx - yy*yy))
+                ax = abs(xx); ay = abs(yy)
+                if ax >= ay and ax >= z:
+                    f = 0 if xx >= 0 else 1
+                    m = ax; s = yy / m; t = z / m
+                elif ay >= z:
+                    f = 2 if yy >= 0 else 3
+                    m = ay; s = xx / m; t = z / m
+                else:
+                    f = 4
+                    m = z; s = xx / m; t = yy / m
+                fs = (s + 1) * 0.5 * (F - 1)
+                ft = (t + 1) * 0.5 * (F - 1)
+                si = int(fs); ti = int(ft)
+                fu = fs - si; fv = ft - ti
+                si1 = min(si + 1, F - 1)
+                ti1 = min(ti + 1, F - 1)
+                tt = ((1 - fu) * (1 - fv) * faces[f, ti, si] +
+                      fu * (1 - fv) * faces[f, ti, si1] +
+                      (1 - fu) * fv * faces[f, ti1, si] +
+                      fu * fv * faces[f, ti1, si1])
+                disc[row, col] = int(tt * 65535)
+        return disc
+
+TEX_CACHE_DIR = "/mnt/data/_tex_cache"
+
 def map_texture_to_disc(tex_img_path, disc_radius_px):
+    # Sampled discs are cached on disk keyed by (texture, radius) so re-runs
+    # skip the sampling entirely; the texture's mtime is folded into the key
+    # so an updated source image invalidates its cached discs.
+    key = hashlib.md5(
+        f"{tex_img_path}:{os.stat(tex_img_path).st_mtime_ns}:cubemap".encode()
+    ).hexdigest()[:12]
+    cache_path = os.path.join(TEX_CACHE_DIR, f"{key}_{disc_radius_px}.npy")
+    if os.path.exists(cache_path):
+        return np.load(cache_path)
     img = Image.open(tex_img_path).convert("L")
     tex = np.array(img, dtype=np.float32) / 255.0
-    th, tw = tex.shape
-    diam = disc_radius_px * 2 + 1
-    disc = np.zeros((diam, diam), dtype=np.uint16)
-    for dy in range(-disc_radius_px, disc_radius_px + 1):
-        yy = dy / disc_radius_px
-        yrow = dy + disc_radius_px
-        for dx in range(-disc_radius_px, disc_radius_px + 1):
-            if dx*dx + dy*dy > disc_radius_px**2:
-                continue
-            xx = dx / disc_radius_px
-            z = math.sqrt(max(0.0, 1.0 - xx*xx - yy*yy))
-            lat = math.asin(yy)
-            lon = math.atan2(xx, z)
-            u = (lon + math.pi) / (2 * math.pi) * (tw - 1)
-            v = (math.pi/2 - lat) / math.pi * (th - 1)
-            ui, vi = int(u), int(v)
-            disc[yrow, dx + disc_radius_px] = int(tex[vi, ui] * 65535)
+    faces = _equirect_to_cubemap(tex, max(2, tex.shape[1] // 4))
+    if njit is not None:
+        disc = _sample_disc_jit(faces, disc_radius_px)
+    else:
+        disc = _sample_disc_numpy(faces, disc_radius_px)
+    os.makedirs(TEX_CACHE_DIR, exist_ok=True)
+    np.save(cache_path, disc)
     return disc
 
 def paste_disc(cx, cy, disc):
@@ -167,8 +380,9 @@ def paste_disc(cx, cy, disc):
     y0 = max(y0, 0); x0 = max(x0, 0)
     y1 = min(y1, HEIGHT); x1 = min(x1, WIDTH)
     sub_disc = disc[sy0:sy1, sx0:sx1]
-    mask = sub_disc > 0
-    canvas[y0:y1, x0:x1][mask] = sub_disc[mask]
+    # One streaming pass over the region; the masked double-gather version
+    # read the disc twice and materialized the selected pixels in between.
+    np.copyto(canvas[y0:y1, x0:x1], sub_disc, where=sub_disc > 0)
 
 # ===================== Apply / reapply heightmaps =====================
 # Mars (re-texture at same center, same map, but rocky planets tripled => larger disc)
@@ -208,19 +422,25 @@ MOON_DATA = {
     "Neptune":[("Triton",1353,354759),("Proteus",210,117647)],
     "Pluto":[("Charon",606,19591)]
 }
+# NOTE: moon discs and rings of neighbouring moons overlap each other, so
+# their interleaved paint order is load-bearing; they stay as per-moon calls.
+# The per-moon radius/offset arithmetic is batched per planet, though.
 for planet, moons in MOON_DATA.items():
     cxp, cyp = centre_x[planet], centre_y[planet]
     base_outer = sat_out if planet=="Saturn" else ring_high_outer[planet]
-    max_a = max(m[2] for m in moons)
-    for idx, (m_name, r_km, a_km) in enumerate(sorted(moons, key=lambda x: x[2])):
-        mr = max(int(round(r_km * scale)), 2) * 3  # triple moon size
-        offset = base_outer + 60 + (a_km / max_a) * base_outer
-        my = cyp + (-1 if idx % 2 == 0 else 1) * int(round(offset))
-        mx = cxp
+    ordered = sorted(moons, key=lambda m: m[2])
+    a = np.array([m[2] for m in ordered], dtype=np.float64)
+    mrs = (np.maximum(np.rint(np.array([m[1] for m in ordered]) * scale), 2)
+           .astype(np.int64) * 3)  # triple moon size
+    offsets = np.rint(base_outer + 60 + (a / a.max()) * base_outer).astype(np.int64)
+    signs = np.where(np.arange(len(ordered)) % 2 == 0, -1, 1)
+    mys = cyp + signs * offsets
+    for (m_name, _, _), mr, my in zip(ordered, mrs, mys):
+        mr, my = int(mr), int(my)
         if not (planet == "Earth" and m_name == "Moon"):
-            draw_circle(mx, my, mr, GRAY_PLANET)
+            draw_circle(cxp, my, mr, GRAY_PLANET)
         r_in = mr + MOON_RING_OFF
-        draw_annulus(mx, my, r_in, r_in + MOON_RING_THICK, GRAY_ORBIT_RING)
+        draw_annulus(cxp, my, r_in, r_in + MOON_RING_THICK, GRAY_ORBIT_RING)
 
 # ===================== Asteroid belt =====================
 # Start from baseline belt bounds (from original 16k layout using base radii)
@@ -233,50 +453,86 @@ belt_right = belt_right_base + BELT_RIGHT_SHIFT
 belt_left  = max(0, belt_left)
 belt_right = min(WIDTH-1, belt_right)
 
-# Recreate asteroids (same sizes as before)
-asteroids = []
+# Recreate asteroids (same sizes as before); centres/radii kept as growing
+# NumPy arrays so each candidate is tested with one vectorized comparison
+# instead of a Python scan over everything placed so far.
+N_ASTEROIDS = 200
+ast_xy = np.empty((N_ASTEROIDS, 2), dtype=np.int64)
+ast_r  = np.empty(N_ASTEROIDS, dtype=np.int64)
+n_ast  = 0
+
+# Candidate centres for the whole belt come from one pass of Poisson-disk
+# sampling: pre-spaced beyond any small-asteroid separation, so the
+# feasibility tests below almost never reject. Shuffled because the sampler
+# emits points in growth order, not scattered across the belt. The dwarf
+# separations exceed the Poisson radius, so those stay explicitly checked.
+if qmc is not None:
+    _engine = qmc.PoissonDisk(d=2, radius=48, ncandidates=10, seed=rng,
+                              l_bounds=[belt_left, 0],
+                              u_bounds=[belt_right, HEIGHT - 1])
+    belt_cands = _engine.fill_space().astype(np.int64)
+    belt_cands = belt_cands[rng.permutation(len(belt_cands))]
+else:  # plain uniform candidates; rejections then do the spacing
+    belt_cands = np.column_stack([
+        rng.integers(belt_left, belt_right + 1, size=20000),
+        rng.integers(0, HEIGHT, size=20000),
+    ])
+# Radii are pre-drawn alongside the candidate pool rather than one
+# np.random call per placement attempt.
+cand_r = rng.integers(ASTEROID_R_MIN, ASTEROID_R_MAX + 1, size=len(belt_cands))
+cand_i = 0
 
 # Dwarf bodies with same sizes as before (NOT tripled)
 dwarf_defs = [("Ceres",473),("Vesta",262),("Pallas",272),("Hygiea",215)]
-dwarf_ring_extents = []
+dwarf_ring_extents = np.empty((len(dwarf_defs), 3), dtype=np.int64)  # (x, y, extent)
+n_dwarfs = 0
 for name, r_km in dwarf_defs:
     core_r = max(int(round(r_km * scale)), 30)  # unchanged size
-    placed = False
-    tries = 0
-    while not placed and tries < 8000:
-        ax = random.randint(belt_left, belt_right)
-        ay = random.randint(0, HEIGHT-1)
-        ok = True
-        for (ex, ey, eR) in dwarf_ring_extents:
-            if (ax - ex)**2 + (ay - ey)**2 < (core_r + MOON_RING_OFF + MOON_RING_THICK + eR + 2)**2:
-                ok = False; break
-        if ok:
+    while cand_i < len(belt_cands):
+        ax, ay = int(belt_cands[cand_i, 0]), int(belt_cands[cand_i, 1])
+        cand_i += 1
+        ext = dwarf_ring_extents[:n_dwarfs]
+        d2 = (ext[:, 0] - ax)**2 + (ext[:, 1] - ay)**2
+        if bool((d2 >= (core_r + MOON_RING_OFF + MOON_RING_THICK + ext[:, 2] + 2)**2).all()):
             draw_circle(ax, ay, core_r, GRAY_ASTEROID)
             r_in = core_r + MOON_RING_OFF
             draw_annulus(ax, ay, r_in, r_in + MOON_RING_THICK, GRAY_ORBIT_RING)
-            dwarf_ring_extents.append((ax, ay, r_in + MOON_RING_THICK))
-            asteroids.append((ax, ay, core_r))
-            placed = True
-        tries += 1
+            dwarf_ring_extents[n_dwarfs] = (ax, ay, r_in + MOON_RING_THICK)
+            n_dwarfs += 1
+            ast_xy[n_ast] = (ax, ay); ast_r[n_ast] = core_r
+            n_ast += 1
+            break
+dwarf_ring_extents = dwarf_ring_extents[:n_dwarfs]
 
 # Fill to 200 total asteroids, same size range as before
-while len(asteroids) < 200:
-    r = random.randint(8, 15)  # unchanged sizes
-    ax = random.randint(belt_left, belt_right)
-    ay = random.randint(0, HEIGHT-1)
-    ok = True
-    for ax2, ay2, ar2 in asteroids:
-        if (ax - ax2)**2 + (ay - ay2)**2 < (r + ar2 + 2)**2:
-            ok = False; break
+n_small_start = n_ast
+while n_ast < N_ASTEROIDS and cand_i < len(belt_cands):
+    ax, ay = int(belt_cands[cand_i, 0]), int(belt_cands[cand_i, 1])
+    r = int(cand_r[cand_i])  # unchanged sizes
+    cand_i += 1
+    d2 = (ast_xy[:n_ast, 0] - ax)**2 + (ast_xy[:n_ast, 1] - ay)**2
+    ok = bool((d2 >= (ast_r[:n_ast] + r + 2)**2).all())
     if ok:
-        for dx, dy, dr in dwarf_ring_extents:
-            if (ax - dx)**2 + (y - dy)**2 < (r + dr + 2)**2:
-                ok = False; break
+        d2 = (dwarf_ring_extents[:, 0] - ax)**2 + (dwarf_ring_extents[:, 1] - ay)**2
+        ok = bool((d2 >= (dwarf_ring_extents[:, 2] + r + 2)**2).all())
     if ok:
-        asteroids.append((ax, ay, r))
-        draw_circle(ax, ay, r, GRAY_ASTEROID)
+        ast_xy[n_ast] = (ax, ay); ast_r[n_ast] = r
+        n_ast += 1
+
+# Paint the small asteroids in one fancy-index pass per radius class
+# (only 8 distinct radii) instead of ~200 draw_circle calls.
+for r in range(ASTEROID_R_MIN, ASTEROID_R_MAX + 1):
+    sel = ast_r[n_small_start:n_ast] == r
+    if sel.any():
+        draw_circles_batch(ast_xy[n_small_start:n_ast, 0][sel],
+                           ast_xy[n_small_start:n_ast, 1][sel], r, GRAY_ASTEROID)
 
 # ===================== SAVE =====================
 out_path = "/mnt/data/solar_system_16384x8192_tripled_rockies_moons_shifted_belt.png"
-Image.fromarray(canvas, mode="I;16").save(out_path)
+canvas.flush()
+# frombuffer shares the canvas memory instead of copying it like fromarray
+# does, so the encoder reads straight from the memmap.
+Image.frombuffer("I;16", (WIDTH, HEIGHT), canvas, "raw", "I;16", 0, 1).save(out_path)
+del canvas
+os.remove(CANVAS_PATH)
 print("Saved:", out_path)